@@ -9,6 +9,7 @@ dataframe.
 * Major Update Log
 09/06/2022 - Main Architecture Designed 
 '''
+import numpy as np
 import pandas as pd
 
 def access_by_attribute(long, lat):
@@ -19,5 +20,14 @@ def access_by_attribute(long, lat):
 def access_by_location_dict(key):
 	'''Accesses the data by the provided latitude and longitude
 	'''
-	return lambda df: (df[key].apply(pd.Series)['longitude'],\
-					   df[key].apply(pd.Series)['latitude'])
\ No newline at end of file
+	#pull each coordinate straight out of the dicts in one fromiter pass;
+	#.apply(pd.Series) built a Series per row just to project one column
+	def accessor(df):
+		values = df[key].values
+		long = np.fromiter((d['longitude'] for d in values), \
+						   dtype=np.float64, count=len(df))
+		lat = np.fromiter((d['latitude'] for d in values), \
+						  dtype=np.float64, count=len(df))
+		return long, lat
+
+	return accessor
\ No newline at end of file
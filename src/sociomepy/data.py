@@ -18,6 +18,7 @@ import urllib.request
 import logging
 import os
 import datetime
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 
@@ -42,6 +43,35 @@ class SociomeDataFrame(object):
 		'''
 		self.data = pd.DataFrame([]) #initialize data to an empty data frame
 		self.subdivisions = []
+		self._blocks = {} #cached contiguous numeric blocks, see ensure_block
+
+
+	@staticmethod
+	def _read_geo_file(filename, nrows=-1):
+		'''Reads a geospatial file into a GeoDataFrame. Prefers the pyogrio
+		engine, which moves the read loop into C over GDAL, and falls back
+		to the default fiona engine when pyogrio is not installed.
+
+			Parameters:
+                    filename (str): A file name (or a file pointer)
+                    nrows (int): number of rows to read, -1 means read the whole file
+
+            Returns:
+                    gdf (GeoDataFrame): The loaded data
+		'''
+		try:
+			if nrows == -1:
+				return gpd.read_file(filename, engine='pyogrio', use_arrow=True)
+
+			import pyogrio
+			return pyogrio.read_dataframe(filename, max_features=nrows)
+		except ImportError:
+			pass
+
+		if nrows == -1:
+			return gpd.read_file(filename)
+
+		return gpd.read_file(filename, rows=nrows)
 
 
 	@classmethod
@@ -61,11 +91,7 @@ class SociomeDataFrame(object):
 		logging.info(SociomeDataFrame.CLASS_LOG_PREFIX  + 'Loading Sociome Object From = ' + filename)
 
 		sociome = cls()
-
-		if nrows == -1:
-			sociome.data = gpd.read_file(filename)
-		else:
-			sociome.data = gpd.read_file(filename, rows=nrows)
+		sociome.data = SociomeDataFrame._read_geo_file(filename, nrows)
 
 		elapsed = (datetime.datetime.now() - timer).total_seconds()
 		logging.info(SociomeDataFrame.CLASS_LOG_PREFIX  + ' from_save_file took' + str(elapsed) + ' s')
@@ -101,10 +127,7 @@ class SociomeDataFrame(object):
 		else:
 			filename = 'zip://' + filename + '!' + local_name_no_ext
 
-		if nrows == -1:
-			sociome.data = gpd.read_file(filename)
-		else:
-			sociome.data = gpd.read_file(filename, rows=nrows)
+		sociome.data = SociomeDataFrame._read_geo_file(filename, nrows)
 
 		elapsed = (datetime.datetime.now() - timer).total_seconds()
 		logging.info(SociomeDataFrame.CLASS_LOG_PREFIX  + ' from_save_file took' + str(elapsed) + ' s')
@@ -167,13 +190,19 @@ class SociomeDataFrame(object):
 		timer = datetime.datetime.now()
 
 		sociome = cls()
+
+		#force float64 ndarrays into points_from_xy so the vectorized C
+		#point constructor runs instead of falling back to Python objects
+		long, lat = accessor(df)
+		long = np.asarray(long, dtype=np.float64)
+		lat = np.asarray(lat, dtype=np.float64)
+
 		sociome.data = gpd.GeoDataFrame(df, \
-									    geometry=gpd.points_from_xy(*accessor(df)))
+									    geometry=gpd.points_from_xy(long, lat, crs='EPSG:4269'))
 
 		#only keep non-empty geometries
 		sociome.data = sociome.data[~(sociome.data['geometry'].is_empty | sociome.data['geometry'].isna())]
 
-		sociome.data.set_crs(epsg=4269, inplace=True)
 		sociome.data[SociomeDataFrame.LOCATIONS_KEY] = 1
 
 		elapsed = (datetime.datetime.now() - timer).total_seconds()
@@ -182,14 +211,31 @@ class SociomeDataFrame(object):
 		return sociome
 
 
+	@staticmethod
+	def _clean_lat_long(df):
+		'''Keeps only rows whose lat/long coordinates are present and in
+		range, using one boolean mask over both columns; longitude is
+		bounded by 180.
+		'''
+		import sociomepy.arcgis as arcgis
+
+		lat = df[arcgis.ARCGIS_LAT].to_numpy()
+		long = df[arcgis.ARCGIS_LONG].to_numpy()
+		mask = (np.abs(lat) <= 90) & (np.abs(long) <= 180) & \
+			   ~np.isnan(lat) & ~np.isnan(long)
+		return df.iloc[mask]
+
+
 	@classmethod
-	def from_arcgis_file(cls, filename, nrows=-1):
+	def from_arcgis_file(cls, filename, nrows=-1, chunksize=None):
 		'''Creates a SociomeDataFrame from an arcgis file
 
 			Parameters:
                     filename (str): A file name (or a file pointer)
                     nrows (int): number of rows to read, -1 means read the whole file
-                    
+                    chunksize (int): rows to read and clean per chunk;
+                    passing one forces the memory-bounded chunked read
+
             Returns:
                     sociome (SociomeDataFrame): A SociomeDataFrame with the data
 		'''
@@ -203,27 +249,49 @@ class SociomeDataFrame(object):
 		#initialize
 		sociome = cls()
 
-		#load
-		if nrows == -1:
-			df = pd.read_csv(filename)
-		else:
-			df = pd.read_csv(filename, nrows=nrows)
+		#load: the pyarrow engine tokenizes the CSV with SIMD across
+		#cores, but it reads the whole file at once — it is only used
+		#when the caller did not ask for chunking or a partial read
+		df = None
+
+		if nrows == -1 and chunksize is None:
+			try:
+				df = pd.read_csv(filename, usecols=arcgis.ARCGIS_PROJ, \
+								 engine='pyarrow')
+				df = SociomeDataFrame._clean_lat_long(df)
+			except ImportError:
+				df = None
+
+		if df is None:
+			#clean chunk by chunk so peak memory is bounded by the chunk
+			#size plus the surviving rows, not the whole file; usecols
+			#skips parsing columns the projection drops anyway
+			if chunksize is None:
+				chunksize = 1000000
+
+			if nrows == -1:
+				chunks = pd.read_csv(filename, usecols=arcgis.ARCGIS_PROJ, \
+									 chunksize=chunksize)
+			else:
+				chunks = pd.read_csv(filename, usecols=arcgis.ARCGIS_PROJ, \
+									 nrows=nrows, chunksize=chunksize)
 
-		#clean
-		df[arcgis.ARCGIS_LAT] = df[arcgis.ARCGIS_LAT].where(df[arcgis.ARCGIS_LAT].abs() <= 90)
-		df[arcgis.ARCGIS_LONG] = df[arcgis.ARCGIS_LONG].where(df[arcgis.ARCGIS_LONG].abs() <= 90)
-		df = df.dropna(subset=[arcgis.ARCGIS_LAT, arcgis.ARCGIS_LONG])
+			df = pd.concat([SociomeDataFrame._clean_lat_long(chunk) \
+							for chunk in chunks], ignore_index=True)
 
 		sociome.data = gpd.GeoDataFrame(df[arcgis.ARCGIS_PROJ], \
-									    geometry=gpd.points_from_xy(df[arcgis.ARCGIS_LONG], \
-																    df[arcgis.ARCGIS_LAT]))
+									    geometry=gpd.points_from_xy(df[arcgis.ARCGIS_LONG].to_numpy(dtype=np.float64), \
+																    df[arcgis.ARCGIS_LAT].to_numpy(dtype=np.float64), \
+																    crs='EPSG:4269'))
 
 		#only keep non-empty geometries
 		sociome.data = sociome.data[~(sociome.data['geometry'].is_empty | sociome.data['geometry'].isna())]
 
-		sociome.data.set_crs(epsg=4269, inplace=True)
 		sociome.data[SociomeDataFrame.LOCATIONS_KEY] = 1
 
+		sociome.data[arcgis.ARCGIS_BASIC_ZIP] = \
+					sociome.data[arcgis.ARCGIS_BASIC_ZIP].astype('category')
+
 		sociome.subdivisions.append(arcgis.ARCGIS_BASIC_ZIP)
 
 		elapsed = (datetime.datetime.now() - timer).total_seconds()
@@ -243,6 +311,29 @@ class SociomeDataFrame(object):
 		return self.data[['geometry']]
 
 
+	def ensure_block(self, cols, dtype=None):
+		'''Materializes the given columns as one C-contiguous NumPy block
+		and caches it, so repeated numeric access (model fitting, gram
+		accumulation) does not re-concatenate the columns every call.
+		The cached block is shared: callers that write into it see each
+		other's writes.
+
+			Parameters:
+					cols (list[str]): The columns to materialize
+					dtype (numpy dtype): Optional dtype of the block
+
+            Returns:
+                    block (numpy array): A contiguous array of the columns
+		'''
+		key = (tuple(cols), str(dtype))
+
+		if key not in self._blocks:
+			self._blocks[key] = \
+					np.ascontiguousarray(self.data[cols].to_numpy(dtype=dtype))
+
+		return self._blocks[key]
+
+
 	def merge_on_geometry(self, gdf, columns):
 		'''Adds data from a GeoDataFrame with the same geometry as the SociomeDataFrame.
 		Note: the augmenting data must be in the same order as the original data.
@@ -257,6 +348,7 @@ class SociomeDataFrame(object):
 		gdf = gdf.rename(columns=columns)
 
 		self.data = pd.concat([self.data, gdf], axis=1)
+		self._blocks = {} #cached blocks no longer reflect self.data
 		return self
 
 
@@ -298,9 +390,27 @@ class SociomeDataFrame(object):
 		gdf = gdf[['geometry', subdivision_key]]#keep only the relevant ones
 		gdf = gdf.rename(columns={subdivision_key: subdivision_name})
 
-		self.data = gpd.sjoin(self.data, gdf, how='left', op='within')
-		self.data = self.data.drop(columns=['index_right'])
-		
+		try:
+			#query the STRtree directly: one vectorized point-in-polygon
+			#pass without sjoin's index alignment overhead
+			import shapely
+			tree = shapely.STRtree(gdf.geometry.values)
+			pt_idx, poly_idx = tree.query(self.data.geometry.values, \
+										  predicate='within')
+
+			labels = np.full(len(self.data), pd.NA, dtype=object)
+			labels[pt_idx] = gdf[subdivision_name].to_numpy()[poly_idx]
+			self.data[subdivision_name] = labels
+		except AttributeError:
+			#shapely 1.x has no vectorized STRtree query
+			self.data = gpd.sjoin(self.data, gdf, how='left', predicate='within')
+			self.data = self.data.drop(columns=['index_right'])
+
+		#subdivision keys repeat heavily; categoricals store them as
+		#integer codes, which also speeds later groupbys and merges
+		self.data[subdivision_name] = self.data[subdivision_name].astype('category')
+		self._blocks = {} #cached blocks no longer reflect self.data
+
 		self.subdivisions.append(subdivision_name)
 
 		logging.info(SociomeDataFrame.CLASS_LOG_PREFIX  + 'Complete adding a subdivision ' + str(subdivision_name))
@@ -330,7 +440,17 @@ class SociomeDataFrame(object):
 		gdf = gdf[[right_on] + list(columns.keys())]#keep only the relevant ones
 		gdf = gdf.rename(columns=columns)
 
+		#merges on categorical keys run on integer codes, so align both
+		#key columns to one shared categorical dtype before merging
+		left_cat = self.data[subdivision].astype('category')
+		right_cat = gdf[right_on].astype('category')
+		dtype = pd.api.types.union_categoricals([left_cat, right_cat]).dtype
+
+		self.data[subdivision] = left_cat.astype(dtype)
+		gdf[right_on] = right_cat.astype(dtype)
+
 		self.data = self.data.merge(gdf, how='left', left_on=subdivision, right_on=right_on)
+		self._blocks = {} #cached blocks no longer reflect self.data
 		return self
 
 
@@ -348,7 +468,12 @@ class SociomeDataFrame(object):
 		'''
 
 		gdf = metric.eval(self) #evaluate the dataframe on the metric
-		self.data[name] = gdf['metric']
+
+		#eval outputs are row-aligned with self.data, so take the raw
+		#array and assign positionally: no label alignment, and no
+		#silent NaNs when the indexes do not line up
+		self.data[name] = gdf['metric'].to_numpy()
+		self._blocks = {} #cached blocks no longer reflect self.data
 		return self
 
 
@@ -366,13 +491,45 @@ class SociomeDataFrame(object):
 		'''
 		timer = datetime.datetime.now()
 		logging.info(SociomeDataFrame.CLASS_LOG_PREFIX  + 'Saving SociomeDataFrame to File = ' + filename)
-		self.data.to_file(filename)
+
+		if filename.endswith('.parquet'):
+			#GeoParquet writes are columnar already
+			self.data.to_parquet(filename)
+		else:
+			try:
+				#pyogrio + Arrow moves the write loop out of Python
+				self.data.to_file(filename, engine='pyogrio', use_arrow=True)
+			except (ImportError, TypeError):
+				self.data.to_file(filename)
 
 		elapsed = (datetime.datetime.now() - timer).total_seconds()
 
 		logging.info(SociomeDataFrame.CLASS_LOG_PREFIX  + 'Complete Saving SociomeDataFrame took ' + str(elapsed) + 's')
 
 
+	def to_arrow(self):
+		'''Returns the data as an Arrow table for zero-copy interchange
+		with Arrow-native engines (DuckDB spatial, Sedona, pyogrio).
+		On GeoPandas 1.0+ the geometry column uses the GeoArrow encoding;
+		older versions fall back to WKB bytes.
+
+			Parameters:
+					None
+
+            Returns:
+                    table (pyarrow.Table): The data as an Arrow table
+		'''
+		import pyarrow as pa
+
+		try:
+			return pa.table(self.data.to_arrow())
+		except AttributeError:
+			#pre-1.0 geopandas: ship the geometry as WKB
+			df = pd.DataFrame(self.data.drop(columns='geometry'))
+			df['geometry'] = self.data.geometry.to_wkb()
+			return pa.Table.from_pandas(df)
+
+
 	def to_mpl_file(self, filename, columns, sampling_rate=1):
 		'''Visualizes the data as a matplotlib png 
 
@@ -1,7 +1,115 @@
 '''address.py defines fuzzy matches of two SociomeDataFrames
 '''
+import numpy as np
 import pandas as pd
-from fuzzywuzzy import fuzz
+
+from rapidfuzz import process, fuzz
+
+from ..data import SociomeDataFrame
+
+
+def _address_strings(df, columns):
+    '''Collapses the address columns of a dataframe into a single
+    lower-cased string per row. The columns are combined with vectorized
+    Series concatenation; .agg(' '.join, axis=1) would run a Python call
+    and a list allocation per row.
+    '''
+    out = df[columns[0]].astype(str)
+
+    for col in columns[1:]:
+        out = out + ' ' + df[col].astype(str)
+
+    return out.str.lower().to_numpy()
+
+
+def _suffix_common_columns(left, right, lsuffix='left', rsuffix='right'):
+    '''Renames columns that appear in both frames with sjoin-style
+    suffixes so the concatenated match result has unique column names.
+    '''
+    common = left.columns.intersection(right.columns)
+
+    left = left.rename(columns={col: '%s_%s' % (col, lsuffix) \
+                                for col in common})
+    right = right.rename(columns={col: '%s_%s' % (col, rsuffix) \
+                                  for col in common})
+
+    return left, right
+
+
+class AddressLookup(object):
+    '''
+    An address lookup finds the best fuzzy match for a single query address
+    inside one SociomeDataFrame, e.g. for one-off geocoding.
+    '''
+
+    def __init__(self, sdf, address_cols, zip_col=None):
+        '''Constructor for an AddressLookup object.
+
+        Parameters:
+                sdf (SociomeDataFrame): The frame to search
+                address_cols (list[str]): Address columns in the frame
+                zip_col (str): An optional zip code column to pre-filter on
+        '''
+        self.sdf = sdf
+        self.address_cols = address_cols
+        self.zip_col = zip_col
+
+        #the composite lower-cased address strings are built once and
+        #indexed into on every query instead of rebuilt per call
+        self._addr_lower = _address_strings(sdf.data, address_cols)
+
+        #hash index from zip code to row positions, built once so that a
+        #zip-filtered lookup never rescans the whole table
+        if zip_col is not None:
+            self._by_zip = {int(z): rows for z, rows in \
+                            sdf.data.groupby(zip_col).indices.items()}
+        else:
+            self._by_zip = None
+
+    def find(self, address, zipcode=None, k=1):
+        '''Finds the row(s) whose address best matches the query. The
+        whole candidate scan runs inside one rapidfuzz call instead of a
+        Python loop with per-row scoring and a sort.
+
+        Parameters:
+                address (str): The query address
+                zipcode: An optional zip code to restrict the candidates
+                k (int): How many of the best matches to return
+
+        Returns:
+                (row, score): The best-matching row and its match score,
+                or (None, 0) when the zip code has no candidates. With
+                k > 1, the k best rows and their scores, best first
+        '''
+        data = self.sdf.data
+        candidates = self._addr_lower
+
+        if zipcode is not None and self._by_zip is not None:
+            rows = self._by_zip.get(int(zipcode))
+
+            if rows is None or len(rows) == 0:
+                return None, 0
+
+            data = data.iloc[rows]
+            candidates = self._addr_lower[rows]
+
+        if k == 1:
+            _, score, idx = process.extractOne(address.lower(), candidates, \
+                                               scorer=fuzz.token_set_ratio)
+
+            return data.iloc[idx], score
+
+        #top-k: an O(m) argpartition recovers the k winners without a
+        #full sort of the score vector
+        scores = process.cdist([address.lower()], candidates, \
+                               scorer=fuzz.token_set_ratio)[0]
+
+        k = min(k, len(candidates))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+
+        return data.iloc[top], scores[top]
+
 
 class AddressMatcher(object):
     '''
@@ -9,10 +117,96 @@ class AddressMatcher(object):
     sociomedataframes using a fuzzy matching algorithm.
     '''
 
-    def __init__(self, address_left, address_right):
+    def __init__(self, address_left, address_right, \
+                 blocker_left=None, blocker_right=None, one_to_one=False):
         '''Constructor for an AddressMatcher object.
+
+        Parameters:
+                address_left (list[str]): Address columns in the left frame
+                address_right (list[str]): Address columns in the right frame
+                blocker_left (str): An optional blocking key in the left frame
+                blocker_right (str): An optional blocking key in the right frame
+                one_to_one (bool): Solve an assignment problem so no right
+                row is matched twice, instead of the per-row argmax
         '''
         self.address_left = address_left
         self.address_right = address_right
+        self.blocker_left = blocker_left
+        self.blocker_right = blocker_right
+        self.one_to_one = one_to_one
+
+    def match(self, sdf_left, sdf_right):
+        '''Matches every row of the left SociomeDataFrame to its best
+        fuzzy address match in the right one.
+
+        The full score matrix is computed in a single rapidfuzz cdist
+        call (C++, all cores) instead of a Python loop over row pairs.
+
+        Parameters:
+                sdf_left (SociomeDataFrame): The left frame
+                sdf_right (SociomeDataFrame): The right frame
+
+        Returns:
+                s (SociomeDataFrame): One row per left row with the best
+                right match concatenated on
+        '''
+        left = sdf_left.data
+        right = sdf_right.data
+
+        if self.blocker_left is None:
+            data = self._match_block(left, right)
+        else:
+            #O(1) block retrieval; only keys present on both sides are
+            #scored, in sorted order so the output is deterministic.
+            #observed=True keeps categorical blockers (e.g. the zip codes
+            #from_arcgis_file produces) from yielding zero-row groups for
+            #unobserved categories; the length guard drops any key whose
+            #block is empty on either side, same as a key that is absent
+            lg = dict(list(left.groupby(self.blocker_left, observed=True)))
+            rg = dict(list(right.groupby(self.blocker_right, observed=True)))
+            common = sorted(lg.keys() & rg.keys())
+
+            blocks = [self._match_block(lg[key], rg[key]) for key in common \
+                      if len(lg[key]) > 0 and len(rg[key]) > 0]
+
+            if blocks:
+                data = pd.concat(blocks, ignore_index=True)
+            else:
+                #no shared blocker keys: an empty match, not an error
+                data = pd.DataFrame()
+
+        s = SociomeDataFrame()
+        s.data = data
+        s.subdivisions = sdf_left.subdivisions + sdf_right.subdivisions
+        return s
+
+    def _match_block(self, block_left, block_right):
+        '''Scores one pair of blocks and returns the matched rows.
+        '''
+        L = _address_strings(block_left, self.address_left)
+        R = _address_strings(block_right, self.address_right)
+
+        #uint8 is enough for 0-100 scores and quarters the matrix memory
+        scores = process.cdist(L, R, scorer=fuzz.token_set_ratio, \
+                               workers=-1, dtype=np.uint8)
+
+        if self.one_to_one:
+            #Jonker-Volgenant assignment: each right row is used at most
+            #once, maximizing the total match score
+            from scipy.optimize import linear_sum_assignment
+            rows, cols = linear_sum_assignment(scores, maximize=True)
+
+            matched_left = block_left.iloc[rows].reset_index(drop=True)
+            matched_right = block_right.iloc[cols].reset_index(drop=True)
+        else:
+            best = scores.argmax(axis=1)
+
+            matched_left = block_left.reset_index(drop=True)
+            matched_right = block_right.iloc[best].reset_index(drop=True)
 
+        #the frames usually share schema, so disambiguate collisions the
+        #way sjoin does rather than emitting duplicate column names
+        matched_left, matched_right = _suffix_common_columns(matched_left, \
+                                                             matched_right)
 
+        return pd.concat([matched_left, matched_right], axis=1)
@@ -1,25 +1,74 @@
 '''geometry.py defines geometric matches of two SociomeDataFrames
 '''
+import warnings
+
+import numpy as np
+import pandas as pd
+import shapely
 
 from ..data import SociomeDataFrame
 
+#sjoin_nearest only dispatches to the vectorized C STRtree on shapely 2
+if int(shapely.__version__.split('.')[0]) < 2:
+    warnings.warn('shapely < 2 detected: sjoin_nearest will fall back to ' \
+                  'the slow per-geometry path')
+
+#above this row count the left side is joined in chunks to bound peak RAM
+CHUNK_ROWS = 1_000_000
+
+
 class GeometricMatcher(object):
     '''GeometricMatcher uses latitude and longitude conditions to integrate SociomeDataFrames
     '''
 
-    def __init__(self, distance_thresh=1e-4):
+    def __init__(self, distance_thresh=1e-4, working_crs=None, \
+                 distance_thresh_m=None):
         '''Constructs a GeometricMatcher. There is a distance threshold to reject obvious non-matches
         and it uses a threshold of 4 decimal places.
+
+        When a working_crs is given, both inputs are projected into it before
+        the join so the tree is built over planar floats and distance_thresh
+        is interpreted in that CRS's units (meters for EPSG:3857).
+
+        distance_thresh_m takes precedence over both: the inputs are
+        projected into a local UTM zone so the threshold is isotropic
+        meters rather than anisotropic degrees.
         '''
 
         self.distance_thresh = distance_thresh
+        self.working_crs = working_crs
+        self.distance_thresh_m = distance_thresh_m
 
     def match(self, sdf1, sdf2):
-        data = sdf1.data.sjoin_nearest(sdf2.data, max_distance=self.distance_thresh, how='inner')
+        a = sdf1.data
+        b = sdf2.data
+
+        thresh = self.distance_thresh
+
+        if self.distance_thresh_m is not None:
+            #a local equidistant CRS keeps the tree's bounding boxes
+            #tight in the requested units, cutting candidate refinement
+            try:
+                crs = a.estimate_utm_crs()
+            except AttributeError:
+                crs = 'EPSG:3857'
+
+            a = a.to_crs(crs)
+            b = b.to_crs(crs)
+            thresh = self.distance_thresh_m
+        elif self.working_crs is not None:
+            a = a.to_crs(self.working_crs)
+            b = b.to_crs(self.working_crs)
+
+        if len(a) > CHUNK_ROWS:
+            parts = np.array_split(np.arange(len(a)), len(a) // CHUNK_ROWS + 1)
+            data = pd.concat([a.iloc[part].sjoin_nearest(b, \
+                              max_distance=thresh, how='inner') \
+                              for part in parts])
+        else:
+            data = a.sjoin_nearest(b, max_distance=thresh, how='inner')
+
         s = SociomeDataFrame()
         s.data = data
         s.subdivisions = sdf1.subdivisions + sdf2.subdivisions
         return s
-
-
-
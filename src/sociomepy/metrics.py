@@ -13,10 +13,63 @@ latitude and longitude pairs.
 import geopandas as gpd
 import pandas as pd
 import numpy as np
-from geopy import distance
 
 from sklearn.neighbors import BallTree
-from rtree import index
+
+
+#mean earth radius in meters, used to convert haversine distances
+EARTH_RADIUS_M = 6371000.0
+
+#numba is an optional dependency that compiles the interpolation kernel
+try:
+	from numba import njit
+
+	@njit(fastmath=True, cache=True)
+	def _gaussian_sum(x0, x1, Xs, FXs, sigma2):
+		#fused single pass over the neighborhood with no temporaries
+		acc = 0.0
+		for j in range(Xs.shape[0]):
+			dx = Xs[j,0] - x0
+			dy = Xs[j,1] - x1
+			acc += np.exp(-(dx*dx + dy*dy)/sigma2)*FXs[j]
+		return acc
+
+except ImportError:
+	_gaussian_sum = None
+
+
+def _get_points(gdf):
+	'''Extracts the (N, 2) long/lat coordinate matrix of a point
+	GeoDataFrame. On shapely 2 this is one C call over the whole
+	geometry column; otherwise fall back to the per-axis accessors
+	stacked without the transposed intermediate.
+
+	Parameters:
+				gdf (GeoDataFrame): A point-geometry dataframe
+
+	Returns:
+				an N x 2 matrix of long,lat points
+	'''
+	try:
+		from shapely import get_coordinates
+		return get_coordinates(gdf['geometry'].values)
+	except ImportError:
+		return np.column_stack([gdf['geometry'].x.to_numpy(), \
+								gdf['geometry'].y.to_numpy()])
+
+
+def _build_tree(X, metric='minkowski'):
+	'''Builds a BallTree over the given points. leaf_size=16 gives better
+	query throughput than the default 40 on geographic point sets.
+
+	Parameters:
+				X (numpy array): an N x d matrix of points
+				metric (str): the tree distance metric
+
+	Returns:
+				a BallTree over X
+	'''
+	return BallTree(X, leaf_size=16, metric=metric)
 
 
 class SpatialFunction(object):
@@ -34,15 +87,14 @@ class SpatialFunction(object):
         Returns:
         			SpatialFunction object
 		'''
-		self.X = np.array([sdf.data['geometry'].x.to_numpy(), \
-						   sdf.data['geometry'].y.to_numpy()]).T
-		
+		self.X = _get_points(sdf.data)
+
 		self.N = self.X.shape[0]
 
 		if metric_col is None:
 			self.FX = np.zeros(self.N)
 		else:
-			self.FX = self.gdf[metric_col].to_numpy()
+			self.FX = sdf.data[metric_col].to_numpy()
 
 		self.metric_col = metric_col
 
@@ -50,7 +102,7 @@ class SpatialFunction(object):
 	def query(self, x):
 		'''Return the value at a particular geometry point
 
-		   Parameters: 
+		   Parameters:
 		   			   x (numpy array): input lat,long vector
 
 		   Returns:
@@ -59,10 +111,32 @@ class SpatialFunction(object):
 		return ValueError("Not Implemented")
 
 
+	def batch_query(self, pts):
+		'''Return the value at every geometry point in a single call.
+
+		   Subclasses override this with a vectorized implementation that
+		   issues one batched tree query instead of N Python-level calls.
+		   The fallback below simply loops over `query`.
+
+		   Parameters:
+		   			   pts (numpy array): an N x 2 matrix of long,lat points
+
+		   Returns:
+		   			   numpy array of N metric values
+		'''
+		N = pts.shape[0]
+		fx = np.empty(N, dtype=np.float64)
+
+		for i in range(N):
+			fx[i] = self.query(pts[i,:].reshape(1,-1))
+
+		return fx
+
+
 	def eval(self, sdf):
 		'''Evaluates the function across another SociomeDataFrame
 
-		   Parameters: 
+		   Parameters:
 		   			   sdf (SociomeDataFrame): An input dataframe
 
 		   Returns:
@@ -70,16 +144,11 @@ class SpatialFunction(object):
 		'''
 
 		gdf = sdf.data
-		pts = np.array([gdf['geometry'].x.to_numpy(), \
-						gdf['geometry'].y.to_numpy()]).T
+		pts = _get_points(gdf)
 
-		N = pts.shape[0]
-		data = []
-		for i in range(N):
-			fx = self.query(pts[i,:].reshape(1,-1))
-			data.append({'x': pts[i,0], 'y': pts[i,1], 'metric': fx})
+		fx = self.batch_query(pts)
 
-		df = pd.DataFrame(data) 
+		df = pd.DataFrame({'x': pts[:,0], 'y': pts[:,1], 'metric': fx})
 		return gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df.x, df.y))
 
 
@@ -99,14 +168,20 @@ class SpatialVoronoiFunction(SpatialFunction):
         			SpatialFunction object
 		'''
 		super(SpatialVoronoiFunction, self).__init__(gdf)
-		self.tree = BallTree(self.X)
+
+		#sklearn's haversine metric expects (lat, long) in radians
+		self.X_rad = np.radians(self.X[:, ::-1])
+		self.tree = _build_tree(self.X_rad, metric='haversine')
 
 	def query(self, x):
 		#overrides the query function
-		_,ind = self.tree.query(x, k=1) 
+		d, _ = self.tree.query(np.radians(x[:, ::-1]), k=1)
+		return d.ravel()[0] * EARTH_RADIUS_M
 
-		ind = ind.flatten()
-		return distance.distance(x, self.X[ind,:]).meters
+	def batch_query(self, pts):
+		#overrides the loop fallback with a single nearest-neighbor query
+		d, _ = self.tree.query(np.radians(pts[:, ::-1]), k=1)
+		return d.ravel() * EARTH_RADIUS_M
 
 
 
@@ -123,17 +198,16 @@ class SpatialDensityFunction(SpatialFunction):
         			SpatialFunction object
 		'''
 		super(SpatialDensityFunction, self).__init__(gdf)
-		self.tree = BallTree(self.X)
+		self.tree = _build_tree(self.X)
 		self.bandwidth = radius/111139
 
 	def query(self, x):
 		#overrides the query function
+		return self.tree.query_radius(x, r=self.bandwidth, count_only=True)[0]
 
-		ind = self.tree.query_radius(x, r=self.bandwidth)[0]
-		if len(ind) == 0:
-			return 0
-
-		return len(ind)
+	def batch_query(self, pts):
+		#overrides the loop fallback with a single counting tree query
+		return self.tree.query_radius(pts, r=self.bandwidth, count_only=True)
 
 
 
@@ -184,14 +258,42 @@ class SpatialSubdivisionFunction(SpatialFunction):
 		gdf = gdf[[self.agg, self.subdivision_right]]#keep only the relevant columns
 		gdf = gdf.rename(columns={self.agg: 'metric'})
 
-
 		gdf_target = sdf.data
+
+		try:
+			return self._arrow_merge(gdf_target, gdf)
+		except ImportError:
+			pass
+
 		gdf_target = gdf_target.merge(gdf, how='left', left_on=self.subdivision, right_on=self.subdivision_right)
 		gdf_target = gdf_target[['metric', 'geometry']]
 
 		return gdf_target
 
 
+	def _arrow_merge(self, gdf_target, gdf):
+		'''Left-joins the aggregate onto the target through pyarrow's
+		multi-threaded hash join. Geometry stays behind in pandas because
+		arrow has no geometry type; rows are re-aligned afterwards via a
+		carried row number since the arrow join does not preserve order.
+		'''
+		import pyarrow as pa
+
+		#categorical keys are decategorized: arrow cannot join dictionaries
+		left = pd.DataFrame({'key': np.asarray(gdf_target[self.subdivision]), \
+							 '__row': np.arange(len(gdf_target))})
+		right = pd.DataFrame({'key': np.asarray(gdf[self.subdivision_right]), \
+							  'metric': gdf['metric'].to_numpy()})
+
+		joined = pa.Table.from_pandas(left).join(pa.Table.from_pandas(right), \
+						keys='key', join_type='left outer').to_pandas()
+		joined = joined.sort_values('__row')
+
+		rows = joined['__row'].to_numpy()
+		return gpd.GeoDataFrame({'metric': joined['metric'].to_numpy(), \
+								 'geometry': gdf_target.geometry.values[rows]})
+
+
 
 class SpatialIdentityFunction(SpatialFunction):
 	'''A spatial identity function simply copies over two dataframes that align on geomtry.
@@ -256,7 +358,7 @@ class SpatialInterpolationFunction(SpatialFunction):
 		'''
 
 		super(SpatialInterpolationFunction, self).__init__(gdf, metric_col)
-		self.tree = BallTree(self.X)
+		self.tree = _build_tree(self.X)
 		self.sigma2 = sigma2
 		self.bandwidth = -np.log(precision)*sigma2
 
@@ -267,11 +369,39 @@ class SpatialInterpolationFunction(SpatialFunction):
 		if len(ind) == 0:
 			return np.NaN
 
+		if _gaussian_sum is not None:
+			x = np.asarray(x).ravel()
+			return _gaussian_sum(x[0], x[1], self.X[ind], self.FX[ind], \
+								 self.sigma2)
+
 		norm_list = np.sum(np.power(self.X[ind] - x, 2), axis=1)
 		explist = np.exp(-norm_list/self.sigma2)
 		return np.dot(explist, self.FX[ind])#/np.sum(explist)
 
 
+	def batch_query(self, pts):
+		#overrides the loop fallback with a single radius query over all points
+		N = pts.shape[0]
+		ind, dist = self.tree.query_radius(pts, r=self.bandwidth, \
+										   return_distance=True)
+
+		counts = np.fromiter((len(i) for i in ind), dtype=np.intp, count=N)
+
+		if counts.sum() == 0:
+			return np.full(N, np.NaN)
+
+		#flatten the ragged neighbor lists and do one weighted bincount
+		flat_ind = np.concatenate(ind)
+		flat_dist = np.concatenate(dist)
+		rows = np.repeat(np.arange(N), counts)
+
+		weights = np.exp(-np.power(flat_dist, 2)/self.sigma2)*self.FX[flat_ind]
+		fx = np.bincount(rows, weights=weights, minlength=N)
+
+		fx[counts == 0] = np.NaN
+		return fx
+
+
 
 
 
@@ -8,16 +8,55 @@ different types of spatial correlations.
 
 09/06/2022 - Main Architecture Designed 
 """
+import geopandas as gpd
 import numpy as np
 import pandas as pd
 
-from sociomepy.data import SociomeDataFrame
+from typing import TYPE_CHECKING
+
+#only needed for annotations; the runtime import lives in fit so that
+#importing model.py does not pull in the data module
+if TYPE_CHECKING:
+	from sociomepy.data import SociomeDataFrame
 
 from sklearn.linear_model import Ridge
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.preprocessing import StandardScaler
 
 
+#numba is an optional dependency that compiles the imputation kernel
+try:
+	from numba import njit, prange
+
+	#no fastmath here: its nnan flag would let LLVM assume values are
+	#never NaN and fold away the very isnan tests this kernel is built on
+	@njit(parallel=True, cache=True)
+	def _impute_mean(V):
+		#one fused pass per column, parallel across columns: the mean
+		#reduction and the NaN fill share a single memory traversal
+		n, p = V.shape
+		for j in prange(p):
+			s = 0.0
+			c = 0
+			for i in range(n):
+				v = V[i, j]
+				if not np.isnan(v):
+					s += v
+					c += 1
+
+			#an all-NaN column stays NaN, matching np.nanmean's behavior
+			#on the fallback path
+			m = s/c if c else np.nan
+			for i in range(n):
+				if np.isnan(V[i, j]):
+					V[i, j] = m
+
+		return V
+
+except ImportError:
+	_impute_mean = None
+
+
 class GeospatialModel(object):
 	'''A geospatial model defines a regression model between
 	a target variable and a set of explanatory variables. Any sklearn
@@ -26,13 +65,16 @@ class GeospatialModel(object):
 	SociomeDataFrame.
 	'''
 
-	def __init__(self, target, explanatory):
+	def __init__(self, target, explanatory, dtype=np.float32):
 		'''Constructs a basic linear model between a target variable
 		and a list of explanatory variables.
 
 			Parameters:
 					target (str): A target variable
 					explanatory (list[str]): A list of possible explanatory variables
+					dtype (numpy dtype): Precision of the feature matrix;
+					float32 halves the bandwidth into BLAS and is plenty
+					for socio-demographic regressors
 
             Returns:
             		None
@@ -42,9 +84,16 @@ class GeospatialModel(object):
 		#variables
 		self.target = [target]
 		self.explanatory = explanatory
+		self.dtype = dtype
 
-		#You need a ridge model because there are some highly correlated variables
-		self.model = Ridge()
+		#You need a ridge model because there are some highly correlated variables.
+		#The explicit cholesky solver skips sklearn's solver auto-detection
+		#and is the fastest direct solver for dense, small-p problems.
+		#copy_X must stay True: fit hands sklearn the cached ensure_block
+		#array, and with copy_X=False sklearn would center it in place
+		self.alpha = 1.0
+		self.model = Ridge(alpha=self.alpha, solver='cholesky', \
+						   fit_intercept=True, copy_X=True)
 
 
 
@@ -57,14 +106,20 @@ class GeospatialModel(object):
 			V (numpy array): Cleaned version of the vector
 		'''
 
-		col_mean = np.nanmean(V, axis=0)
+		#a 1-D target skips the column-broadcast machinery entirely
+		if V.ndim == 1:
+			V[np.isnan(V)] = np.nanmean(V)
+			return V
 
-		#Find indices that you need to replace
-		inds = np.where(np.isnan(V))
+		if _impute_mean is not None:
+			return _impute_mean(V)
 
-		#Place column means in the indices. Align the arrays using take
-		V[inds] = np.take(col_mean, inds[1])
+		col_mean = np.nanmean(V, axis=0)
+		mask = np.isnan(V)
 
+		#masked in-place copy with the means broadcast along rows: one
+		#pass, and no full-size output allocation like np.where
+		np.copyto(V, col_mean, where=mask)
 		return V
 
 
@@ -81,31 +136,183 @@ class GeospatialModel(object):
             		the prediction and residual
 		'''
 
-		#Clean and standardize
-		X = gdf.data[self.explanatory].to_numpy()
+		#Clean and standardize; the cached contiguous blocks feed BLAS
+		#without a fresh concat-and-copy on every fit
+		X = gdf.ensure_block(self.explanatory, dtype=self.dtype)
 		X = self.clean(X)
 
 
-		Y = gdf.data[self.target].to_numpy()
+		Y = gdf.ensure_block(self.target, dtype=self.dtype)
 		Y = self.clean(Y)
 
-		self.model.fit(X,Y)
-		Ypred = self.model.predict(X)
+		n, p = X.shape
 
-		#sets the stats
-		self.set_stats(Ypred, Y, self.model, X)
+		if n > 4*p:
+			#tall matrices take the sufficient-statistics path: one GEMM
+			#plus a (p+1) Cholesky instead of sklearn's SVD over all rows
+			beta = self._fit_ridge_ss(X, Y)
+			Ypred = X @ beta[:-1] + beta[-1]
 
-		gdf = gdf.data.copy()
-		gdf[prediction_name] = Ypred
-		gdf[residual_name] = Y - Ypred
+			#expose the solution where set_stats expects sklearn to put it
+			self.model.coef_ = beta[:-1].reshape(1, -1)
+			self.model.intercept_ = beta[-1]
+
+			#sets the stats; mse/r2 fall out of the cached statistics
+			self.set_stats(Ypred, Y, self.model, X, \
+						   metrics=self._stats_from_ss(beta))
+		else:
+			self.model.fit(X,Y)
+			Ypred = self.model.predict(X)
+
+			#sets the stats
+			self.set_stats(Ypred, Y, self.model, X)
+
+		#build the small result frame directly instead of copying the
+		#full input frame just to slice three columns back out
+		from sociomepy.data import SociomeDataFrame
 
 		s = SociomeDataFrame()
-		s.data = gdf[[prediction_name, residual_name, 'geometry']]
+		s.data = gpd.GeoDataFrame({prediction_name: Ypred.ravel(), \
+								   residual_name: (Y - Ypred).ravel(), \
+								   'geometry': gdf.data['geometry'].values}, \
+								  index=gdf.data.index, crs=gdf.data.crs)
 		return s
 
 
 
-	def set_stats(self, Y, Ypred, model, X):
+	def _fit_ridge_ss(self, X, Y):
+		'''Solves the ridge normal equations from sufficient statistics.
+		The Gram matrix and cross products are cached on the model so a
+		refit at a different alpha never touches X again.
+
+		Parameters:
+					X (numpy array): The explanatory variables
+					Y (numpy array): The target variable
+        Returns:
+        			beta (numpy array): Coefficients, intercept last
+		'''
+		n = X.shape[0]
+
+		#an appended ones column folds the intercept into the solve. The
+		#statistics accumulate in float64 even for a float32 fit: the
+		#sse expansion subtracts large near-equal terms and cancels
+		#catastrophically in single precision
+		Xa = np.hstack([X, np.ones((n, 1), dtype=X.dtype)])
+		Xa = Xa.astype(np.float64, copy=False)
+		Y = Y.astype(np.float64, copy=False)
+
+		self._Sxx = Xa.T @ Xa
+		self._sxy = Xa.T @ Y
+		self._syy = float(Y.T @ Y)
+		self._n = n
+
+		return self._solve_ridge(self.alpha)
+
+
+	def refit(self, alpha):
+		'''Re-solves the ridge system for a new regularization strength
+		from the cached sufficient statistics, in O(p^3) instead of
+		another pass over the data.
+
+		Parameters:
+					alpha (float): The ridge regularization strength
+        Returns:
+        			beta (numpy array): Coefficients, intercept last
+		'''
+		self.alpha = alpha
+		return self._solve_ridge(alpha)
+
+
+	def _solve_ridge(self, alpha):
+		#Cholesky solve of (Sxx + alpha*I) beta = sxy; the intercept
+		#row of the regularizer stays zero so it is not penalized
+		from scipy.linalg import cho_factor, cho_solve
+
+		reg = alpha*np.eye(self._Sxx.shape[0], dtype=self._Sxx.dtype)
+		reg[-1, -1] = 0.0
+
+		return cho_solve(cho_factor(self._Sxx + reg), self._sxy)
+
+
+	def precompute_gram(self, gdf):
+		'''Computes and caches the Gram matrix and cross products over the
+		full explanatory list so that any subset fit afterwards is pure
+		O(p^3) slicing and solving with no pass over the rows.
+
+			Parameters:
+					gdf (SociomeDataFrame): A SociomeDataFrame
+            Returns:
+            		self updated
+		'''
+		X = gdf.ensure_block(self.explanatory, dtype=self.dtype)
+		X = self.clean(X)
+
+		Y = gdf.ensure_block(self.target, dtype=self.dtype)
+		Y = self.clean(Y)
+
+		n = X.shape[0]
+
+		#float64 accumulation, same rationale as _fit_ridge_ss
+		Xa = np.hstack([X, np.ones((n, 1), dtype=X.dtype)])
+		Xa = Xa.astype(np.float64, copy=False)
+
+		self._G_full = Xa.T @ Xa
+		self._Xy_full = Xa.T @ Y.astype(np.float64, copy=False)
+
+		return self
+
+
+	def fit_subset(self, names, alpha=None):
+		'''Solves a ridge fit restricted to a subset of the explanatory
+		variables from the Gram matrix cached by precompute_gram, without
+		touching the data again.
+
+			Parameters:
+					names (list[str]): Explanatory variables to keep
+					alpha (float): Optional regularization override
+            Returns:
+            		beta (numpy array): Coefficients in names order,
+            		intercept last
+		'''
+		from scipy.linalg import cho_factor, cho_solve
+
+		if alpha is None:
+			alpha = self.alpha
+
+		#map names to columns; the last row/column is the intercept
+		ix = np.array([self.explanatory.index(name) for name in names] \
+					  + [self._G_full.shape[0] - 1])
+
+		G = self._G_full[np.ix_(ix, ix)]
+		xy = self._Xy_full[ix]
+
+		reg = alpha*np.eye(len(ix), dtype=G.dtype)
+		reg[-1, -1] = 0.0
+
+		return cho_solve(cho_factor(G + reg), xy)
+
+
+	def _stats_from_ss(self, beta):
+		'''Computes the mse and r2 of a sufficient-statistics fit from the
+		cached Gram matrix and cross products in O(p^2), with no pass over
+		the residuals.
+
+		Parameters:
+					beta (numpy array): Coefficients, intercept last
+        Returns:
+        			(mse, r2): The fit statistics
+		'''
+		sse = float(self._syy - 2.0*(beta.T @ self._sxy) \
+					+ beta.T @ self._Sxx @ beta)
+
+		#the intercept row of sxy is the sum of Y thanks to the ones column
+		ybar = float(self._sxy[-1])/self._n
+		sst = self._syy - self._n*ybar**2
+
+		return sse/self._n, 1.0 - sse/sst
+
+
+	def set_stats(self, Y, Ypred, model, X, metrics=None):
 		'''This function is an internal function that compiles statistics
 		about the fit.
 
@@ -114,6 +321,7 @@ class GeospatialModel(object):
 					Ypred (numpy array): Predicted target variable
 					model (sklearn model): Model fit with sklearn
 					X (numpy array): The features used in the fit
+					metrics (tuple): Optional precomputed (mse, r2)
             Returns:
             		None
 		'''
@@ -124,17 +332,32 @@ class GeospatialModel(object):
 		except:
 			coefficients = None
 
+		if metrics is None:
+			metrics = (mean_squared_error(Y, Ypred), r2_score(Y, Ypred))
 
 		#store stats
-		self.stats = {'mse': mean_squared_error(Y, Ypred),\
-					 'r2': r2_score(Y, Ypred),
+		self.stats = {'mse': metrics[0],\
+					 'r2': metrics[1],
 					 'coefficients': coefficients}
 
 
-		#create an effects table
-		effects_list = [{'Variable': var, 'Coefficient': val} for var, val in coefficients]
-		self.effects_table = pd.DataFrame(effects_list)
-		self.effects_table = self.effects_table.sort_values(by='Coefficient', key=abs)
+		#create an effects table directly from the coefficient array
+		#rather than a dict per variable
+		if coefficients is not None:
+			coefs = np.asarray(model.coef_).ravel()
+			self.effects_table = pd.DataFrame({'Variable': self.explanatory, \
+											   'Coefficient': coefs})
+
+			#order by magnitude with one C-level argsort over |coef|
+			self.effects_table = self.effects_table.iloc[np.argsort(np.abs(coefs))]
+
+
+		#information coefficients for every explanatory variable from a
+		#single corrcoef call rather than one 2x2 correlation per column
+		C = np.corrcoef(np.column_stack([X, Ypred.reshape(-1, 1)]).T)
+		ic_values = np.abs(C[:-1, -1])
+		self.ic_table = pd.DataFrame({'Variable': self.explanatory, \
+									  'IC': ic_values})
 
 
 